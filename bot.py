@@ -1,9 +1,17 @@
+import asyncio
+import functools
 import logging
 import os
+from dataclasses import dataclass
+from io import BytesIO
 from dotenv import load_dotenv
-import requests
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import httpx
+import orjson
+from cachetools import LRUCache, TTLCache
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputFile
+from telegram.helpers import escape_markdown
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler,
     MessageHandler,
@@ -17,46 +25,169 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
-OMDB_API_KEY = os.getenv("OMDB_API_KEY")
-AUTH_USER_IDS = [
-    int(os.getenv("AUTH_USER_ID_1")),
-    int(os.getenv("AUTH_USER_ID_2")),
-]
+# User-facing text, picked by BOT_LANG ("hi" is the original Hinglish copy).
+TRANSLATIONS = {
+    "en": {
+        "unauthorized": "Sorry, you are not authorized to use this bot.",
+        "welcome": "Welcome! Send the name of a movie, TV show or series and I'll send its poster.",
+        "empty_query": "Please send the name of a movie or TV show.",
+        "no_results": "No results found for this query.",
+        "no_media": "No movie or TV show found.",
+        "choose": "Multiple results found. Pick one:",
+        "search_error": "Something went wrong while fetching data. Please try again later.",
+        "details_error": "Couldn't fetch the details. Please try again later.",
+        "no_overview": "No description available.",
+        "poster_failed": "Couldn't send the poster, something went wrong.",
+        "no_poster": "No poster found for this title.",
+        "unexpected_error": "An unexpected error occurred. Please try again later.",
+    },
+    "hi": {
+        "unauthorized": "Sorry, tu authorized nahi hai is bot ko use karne ke liye.",
+        "welcome": "Welcome! Movie, TV show ya series ka naam bhej, mai poster bhej dunga.",
+        "empty_query": "Bhai, movie ya TV show ka naam toh bhej.",
+        "no_results": "Koi result nahi mila is query ke liye.",
+        "no_media": "Koi movie ya TV show nahi mila.",
+        "choose": "Multiple results mile. Ek choose kar:",
+        "search_error": "Kuch error hua data fetch karte waqt. Thodi der baad try kar.",
+        "details_error": "Details fetch karne me error hua. Thodi der baad try kar.",
+        "no_overview": "Koi description nahi hai.",
+        "poster_failed": "Poster nahi bhej saka, kuch error hua.",
+        "no_poster": "Is media ka koi poster nahi mila.",
+        "unexpected_error": "Kuch unexpected error hua. Thodi der baad try kar.",
+    },
+}
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    telegram_token: str
+    tmdb_key: str
+    omdb_key: str | None
+    auth_ids: frozenset[int]
+    lang: str
+
+def load_settings() -> Settings:
+    load_dotenv()
+    required = ["TELEGRAM_BOT_TOKEN", "TMDB_API_KEY", "AUTH_USER_ID_1", "AUTH_USER_ID_2"]
+    missing = [name for name in required if not os.getenv(name)]
+    if missing:
+        raise RuntimeError(f"Missing environment variables: {', '.join(missing)}")
+    lang = os.getenv("BOT_LANG", "hi")
+    if lang not in TRANSLATIONS:
+        raise RuntimeError(f"Unsupported BOT_LANG {lang!r}, expected one of: {', '.join(TRANSLATIONS)}")
+    return Settings(
+        telegram_token=os.environ["TELEGRAM_BOT_TOKEN"],
+        tmdb_key=os.environ["TMDB_API_KEY"],
+        omdb_key=os.getenv("OMDB_API_KEY"),
+        auth_ids=frozenset({int(os.environ["AUTH_USER_ID_1"]), int(os.environ["AUTH_USER_ID_2"])}),
+        lang=lang,
+    )
+
+# Populated by main() once the environment has been validated.
+SETTINGS: Settings
+MESSAGES: dict[str, str]
 
 TMDB_BASE_URL = "https://api.themoviedb.org/3"
 TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
+CAPTION_LIMIT = 1024
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    user_id = update.effective_user.id
-    if user_id not in AUTH_USER_IDS:
-        await update.message.reply_text("Sorry, tu authorized nahi hai is bot ko use karne ke liye.")
-        return
-    await update.message.reply_text(
-        "Welcome! Movie, TV show ya series ka naam bhej, mai poster bhej dunga."
+# Shared client so TMDB calls don't block the event loop and reuse keep-alive connections.
+HTTP = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    http2=True,
+    timeout=10.0,
+)
+
+# TMDB metadata barely changes, so repeat lookups are served from memory.
+SEARCH_CACHE = TTLCache(maxsize=2048, ttl=3600)
+DETAIL_CACHE = TTLCache(maxsize=4096, ttl=86400)
+# Poster images keyed by poster_path, bounded by total size (~20 MB).
+POSTER_CACHE = LRUCache(maxsize=20 * 1024 * 1024, getsizeof=len)
+_CACHE_LOCKS: dict[tuple[int, str], asyncio.Lock] = {}
+
+async def fetch_tmdb(cache: TTLCache, key: str, url: str, params: dict) -> dict:
+    data = cache.get(key)
+    if data is not None:
+        return data
+    # One request per cold key; concurrent callers wait and reuse its result.
+    lock_key = (id(cache), key)
+    lock = _CACHE_LOCKS.setdefault(lock_key, asyncio.Lock())
+    async with lock:
+        try:
+            data = cache.get(key)
+            if data is None:
+                response = await HTTP.get(url, params=params)
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                cache[key] = data
+            return data
+        finally:
+            if _CACHE_LOCKS.get(lock_key) is lock:
+                del _CACHE_LOCKS[lock_key]
+
+async def fetch_details(media_type: str, media_id) -> dict:
+    return await fetch_tmdb(
+        DETAIL_CACHE,
+        f"{media_type}:{media_id}",
+        f"{TMDB_BASE_URL}/{media_type}/{media_id}",
+        {"api_key": SETTINGS.tmdb_key, "language": "en-US"},
     )
 
-async def search_media(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    user_id = update.effective_user.id
-    if user_id not in AUTH_USER_IDS:
-        await update.message.reply_text("Sorry, tu authorized nahi hai is bot ko use karne ke liye.")
-        return
+async def prefetch_details(results: list) -> None:
+    # Warm DETAIL_CACHE while the user is still picking; failures are retried on click.
+    await asyncio.gather(
+        *(fetch_details(r["media_type"], r["id"]) for r in results),
+        return_exceptions=True,
+    )
+
+async def fetch_poster(poster_path: str) -> bytes:
+    content = POSTER_CACHE.get(poster_path)
+    if content is None:
+        response = await HTTP.get(f"{TMDB_IMAGE_BASE_URL}{poster_path}")
+        response.raise_for_status()
+        content = response.content
+        POSTER_CACHE[poster_path] = content
+    return content
+
+def require_auth(handler):
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        if update.effective_user.id not in SETTINGS.auth_ids:
+            if update.callback_query:
+                await update.callback_query.answer()
+            await update.effective_message.reply_text(MESSAGES["unauthorized"])
+            return
+        return await handler(update, context, *args, **kwargs)
+    return wrapper
 
+@require_auth
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    await update.message.reply_text(MESSAGES["welcome"])
+
+def result_button(r: dict) -> InlineKeyboardButton:
+    media_type = r["media_type"]
+    title = r["title"] if media_type == "movie" else r["name"]
+    # `or` also skips dates that are present but null/empty.
+    year = (r.get("release_date") or r.get("first_air_date") or "")[:4]
+    return InlineKeyboardButton(f"{title} ({year})", callback_data=f"{media_type}:{r['id']}")
+
+@require_auth
+async def search_media(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.message.text.strip()
     if not query:
-        await update.message.reply_text("Bhai, movie ya TV show ka naam toh bhej.")
+        await update.message.reply_text(MESSAGES["empty_query"])
         return
 
     try:
-        url = f"{TMDB_BASE_URL}/search/multi?api_key={TMDB_API_KEY}&query={query}&language=en-US&page=1"
-        response = requests.get(url)
-        response.raise_for_status()
-        results = response.json().get("results", [])
+        data = await fetch_tmdb(
+            SEARCH_CACHE,
+            query.lower(),
+            f"{TMDB_BASE_URL}/search/multi",
+            {"api_key": SETTINGS.tmdb_key, "query": query, "language": "en-US", "page": 1},
+        )
+        results = data.get("results", [])
 
         if not results:
-            await update.message.reply_text("Koi result nahi mila is query ke liye.")
+            await update.message.reply_text(MESSAGES["no_results"])
             return
 
         valid_results = [
@@ -64,91 +195,119 @@ async def search_media(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         ]
 
         if not valid_results:
-            await update.message.reply_text("Koi movie ya TV show nahi mila.")
+            await update.message.reply_text(MESSAGES["no_media"])
             return
 
         if len(valid_results) == 1:
             await send_poster(update, context, valid_results[0])
         else:
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        f"{r['title' if r['media_type'] == 'movie' else 'name']} ({r.get('release_date', r.get('first_air_date', ''))[:4]})",
-                        callback_data=f"{r['media_type']}:{r['id']}",
-                    )
-                ]
-                for r in valid_results
-            ]
+            keyboard = [[result_button(r)] for r in valid_results]
             reply_markup = InlineKeyboardMarkup(keyboard)
-            await update.message.reply_text(
-                "Multiple results mile. Ek choose kar:", reply_markup=reply_markup
-            )
+            await update.message.reply_text(MESSAGES["choose"], reply_markup=reply_markup)
+            context.application.create_task(prefetch_details(valid_results))
 
-    except requests.RequestException as e:
-        logger.error(f"TMDB se data fetch karne me error: {e}")
-        await update.message.reply_text("Kuch error hua data fetch karte waqt. Thodi der baad try kar.")
+    except httpx.HTTPError as e:
+        logger.error("TMDB se data fetch karne me error: %s", e)
+        await update.message.reply_text(MESSAGES["search_error"])
 
+@require_auth
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
 
-    user_id = update.effective_user.id
-    if user_id not in AUTH_USER_IDS:
-        await query.message.reply_text("Sorry, tu authorized nahi hai is bot ko use karne ke liye.")
-        return
-
     media_type, media_id = query.data.split(":")
     try:
-        url = f"{TMDB_BASE_URL}/{media_type}/{media_id}?api_key={TMDB_API_KEY}&language=en-US"
-        response = requests.get(url)
-        response.raise_for_status()
-        media = response.json()
+        media = await fetch_details(media_type, media_id)
         await send_poster(update, context, media)
-    except requests.RequestException as e:
-        logger.error(f"Media details fetch karne me error: {e}")
-        await query.message.reply_text("Details fetch karne me error hua. Thodi der baad try kar.")
+    except httpx.HTTPError as e:
+        logger.error("Media details fetch karne me error: %s", e)
+        await query.message.reply_text(MESSAGES["details_error"])
+
+def truncate_caption(caption: str, limit: int = CAPTION_LIMIT) -> str:
+    if len(caption) <= limit:
+        return caption
+    # Cut on a word boundary so we don't split a word or emoji sequence.
+    cut = caption.rfind(" ", 0, limit - 3)
+    return caption[:cut if cut > 0 else limit - 3] + "..."
+
+def format_caption(title: str, release_date: str, overview: str, limit: int | None = None) -> str:
+    heading = f"{title} ({release_date})"
+    if limit is not None:
+        # Telegram counts the rendered text, so truncate before escaping.
+        overview = truncate_caption(overview, limit - len(heading) - 1)
+    return f"*{escape_markdown(heading, version=2)}*\n{escape_markdown(overview, version=2)}"
 
 async def send_poster(update: Update, context: ContextTypes.DEFAULT_TYPE, media: dict) -> None:
     title = media.get("title", media.get("name", "Unknown"))
     release_date = media.get("release_date", media.get("first_air_date", "N/A"))[:4]
-    overview = media.get("overview", "Koi description nahi hai.")
+    overview = media.get("overview", MESSAGES["no_overview"])
     poster_path = media.get("poster_path")
 
-    caption = f"**{title} ({release_date})**\n{overview}"
+    caption = format_caption(title, release_date, overview)
 
     if poster_path:
-        poster_url = f"{TMDB_IMAGE_BASE_URL}{poster_path}"
         try:
+            # Upload the bytes ourselves instead of making Telegram fetch from TMDB.
+            poster = await fetch_poster(poster_path)
             await context.bot.send_photo(
                 chat_id=update.effective_chat.id,
-                photo=poster_url,
-                caption=caption[:1024],
-                parse_mode="Markdown",
+                photo=InputFile(BytesIO(poster), filename="poster.jpg"),
+                caption=format_caption(title, release_date, overview, limit=CAPTION_LIMIT),
+                parse_mode="MarkdownV2",
             )
         except Exception as e:
-            logger.error(f"Poster bhejne me error: {e}")
+            logger.error("Poster bhejne me error: %s", e)
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
-                text=f"{caption}\n\nPoster nahi bhej saka, kuch error hua.",
-                parse_mode="Markdown",
+                text=f"{caption}\n\n{escape_markdown(MESSAGES['poster_failed'], version=2)}",
+                parse_mode="MarkdownV2",
             )
     else:
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
-            text=f"{caption}\n\nIs media ka koi poster nahi mila.",
-            parse_mode="Markdown",
+            text=f"{caption}\n\n{escape_markdown(MESSAGES['no_poster'], version=2)}",
+            parse_mode="MarkdownV2",
         )
 
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    logger.error(f"Update {update} se error hua: {context.error}")
-    if update:
+    logger.error("Update %s se error hua: %s", update, context.error)
+    # Errors from getUpdates etc. arrive without an update or chat to reply to.
+    chat = getattr(update, "effective_chat", None)
+    if chat is None:
+        return
+    try:
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="Kuch unexpected error hua. Thodi der baad try kar.",
+            chat_id=chat.id,
+            text=MESSAGES["unexpected_error"],
         )
+    except Exception as e:
+        # Don't let a failed notice re-enter the error handler.
+        logger.error("Error message bhejne me error: %s", e)
+
+async def close_http_client(application: Application) -> None:
+    await HTTP.aclose()
 
 def main() -> None:
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    global SETTINGS, MESSAGES
+    SETTINGS = load_settings()
+    MESSAGES = TRANSLATIONS[SETTINGS.lang]
+
+    application = (
+        Application.builder()
+        .token(SETTINGS.telegram_token)
+        # Separate pools so long polling never starves outgoing sends.
+        .connection_pool_size(32)
+        .pool_timeout(8.0)
+        .get_updates_connection_pool_size(4)
+        .get_updates_pool_timeout(60.0)
+        .connect_timeout(10.0)
+        .read_timeout(20.0)
+        .write_timeout(20.0)
+        # Throttle before Telegram answers 429 instead of retrying into it.
+        .rate_limiter(AIORateLimiter(overall_max_rate=30, overall_time_period=1, max_retries=3))
+        .post_shutdown(close_http_client)
+        .build()
+    )
     application.add_handler(CommandHandler("start", start))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, search_media))
     application.add_handler(CallbackQueryHandler(button_callback))